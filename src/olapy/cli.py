@@ -1,5 +1,4 @@
 import os
-from distutils.dir_util import copy_tree
 from os.path import dirname, expanduser
 from shutil import copyfile
 
@@ -8,6 +7,9 @@ import click
 
 @click.command()
 def init():
+    # distutils (setuptools) is slow to import, only the init command needs it
+    from distutils.dir_util import copy_tree
+
     if "OLAPY_PATH" in os.environ:
         home_directory = os.environ["OLAPY_PATH"]
     else:
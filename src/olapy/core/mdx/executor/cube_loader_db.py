@@ -3,7 +3,6 @@ from typing import Dict, Text
 import pandas as pd
 import pandas.io.sql as psql
 from pandas.errors import MergeError
-from sqlalchemy import inspect
 
 from ..tools.connection import get_dialect_name
 from . import CubeLoader
@@ -25,6 +24,8 @@ class CubeLoaderDB(CubeLoader):
         :return: tables dict with table name as key and dataframe as value
         """
 
+        from sqlalchemy import inspect
+
         tables = {}
         print("Connection string = " + str(self.sqla_engine))
         inspector = inspect(self.sqla_engine)
@@ -55,6 +56,8 @@ class CubeLoaderDB(CubeLoader):
         :return: star schema DataFrame
         """
 
+        from sqlalchemy import inspect
+
         df = psql.read_sql_query(f"SELECT * FROM {facts}", self.sqla_engine)
         inspector = inspect(self.sqla_engine)
 
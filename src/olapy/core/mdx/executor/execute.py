@@ -724,12 +724,9 @@ class MdxEngine:
         return dfs
 
     def clean_mdx_query(self, mdx_query):
-        try:
-            clean_query = (
-                mdx_query.decode("utf-8").strip().replace("\n", "").replace("\t", "")
-            )
-        except AttributeError:
-            clean_query = mdx_query.strip().replace("\n", "").replace("\t", "")
+        if isinstance(mdx_query, bytes):
+            mdx_query = mdx_query.decode("utf-8")
+        clean_query = mdx_query.strip().replace("\n", "").replace("\t", "")
         # todo property in parser
         self.parser.mdx_query = clean_query
         return clean_query
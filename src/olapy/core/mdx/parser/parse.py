@@ -123,10 +123,8 @@ class Parser:
 
         # Hierarchize -> ON COLUMNS , ON ROWS ...
         # without Hierarchize -> ON 0
-        try:
+        if isinstance(query, bytes):
             query = query.decode("utf-8")
-        except AttributeError:
-            pass
 
         tuples_on_mdx_query = self.get_tuples(query)
         on_rows = []
@@ -1,8 +1,9 @@
 """Managing all database access."""
 
-from typing import List, Optional, Text
+from typing import TYPE_CHECKING, List, Optional, Text
 
-from sqlalchemy.engine import Engine
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
 
 
 class Dialect:
@@ -94,6 +95,28 @@ DIALECT_REGISTRY = {
 }
 
 
+# SqlAlchemy engines by uri, each engine has its own connection pool
+_engines = {}  # type: dict
+
+
+def get_engine(sqla_uri):
+    # type: (Text) -> Engine
+    """Get the SqlAlchemy engine connected to sqla_uri.
+
+    Engines are created once per uri and shared, so that switching back and
+    forth between cubes reuses the pooled connections of their database.
+
+    :param sqla_uri: SqlAlchemy uri
+    :return: SqlAlchemy engine instance
+    """
+    engine = _engines.get(sqla_uri)
+    if engine is None:
+        from sqlalchemy import create_engine
+
+        engine = _engines[sqla_uri] = create_engine(sqla_uri)
+    return engine
+
+
 def get_dialect(sqla_engine):
     # type: (Engine) -> Dialect
     dialect_name = get_dialect_name(sqla_engine.url)
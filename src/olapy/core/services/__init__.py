@@ -1,16 +1,37 @@
-try:
-    # if pyspark install, use it instead of pandas
+# the request handlers import MdxEngine (and pandas or pyspark), they are
+# imported on first use only, so that the cli (olapy --help...) starts fast
+_request_handlers = {}  # type: dict
 
-    import pyspark
 
-    from .spark.xmla_discover_request_handler import (
-        SparkXmlaDiscoverReqHandler as XmlaDiscoverReqHandler,
-    )
-    from .spark.xmla_execute_request_handler import (
-        SparkXmlaExecuteReqHandler as XmlaExecuteReqHandler,
-    )
+def __getattr__(name):
+    if name not in ("XmlaDiscoverReqHandler", "XmlaExecuteReqHandler"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-except ImportError:
+    if not _request_handlers:
+        try:
+            # if pyspark install, use it instead of pandas
 
-    from .xmla_discover_request_handler import XmlaDiscoverReqHandler  # type: ignore
-    from .xmla_execute_request_handler import XmlaExecuteReqHandler  # type: ignore
+            import pyspark
+
+            from .spark.xmla_discover_request_handler import (
+                SparkXmlaDiscoverReqHandler as XmlaDiscoverReqHandler,
+            )
+            from .spark.xmla_execute_request_handler import (
+                SparkXmlaExecuteReqHandler as XmlaExecuteReqHandler,
+            )
+
+        except ImportError:
+
+            from .xmla_discover_request_handler import (
+                XmlaDiscoverReqHandler,
+            )
+            from .xmla_execute_request_handler import (
+                XmlaExecuteReqHandler,
+            )
+
+        _request_handlers.update(
+            XmlaDiscoverReqHandler=XmlaDiscoverReqHandler,
+            XmlaExecuteReqHandler=XmlaExecuteReqHandler,
+        )
+
+    return _request_handlers[name]
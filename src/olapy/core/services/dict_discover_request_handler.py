@@ -15,6 +15,37 @@ from ..services.xmla_discover_request_utils import (
 )
 from ..services.xmla_discover_xsds import discover_preperties_xsd
 
+# Discover RequestType -> (request handler method, whether it takes the request)
+DISCOVER_RESPONSES = {
+    "DISCOVER_DATASOURCES": ("discover_datasources_response", False),
+    "DISCOVER_PROPERTIES": ("discover_properties_response", True),
+    "DISCOVER_SCHEMA_ROWSETS": ("discover_schema_rowsets_response", True),
+    "DISCOVER_LITERALS": ("discover_literals_response", True),
+    "DISCOVER_INSTANCES": ("discover_instances_response", True),
+    "DISCOVER_ENUMERATORS": ("discover_enumerators_response", True),
+    "DISCOVER_KEYWORDS": ("discover_keywords_response", True),
+    "DBSCHEMA_CATALOGS": ("dbschema_catalogs_response", True),
+    "DBSCHEMA_TABLES": ("dbschema_tables_response", True),
+    "DMSCHEMA_MINING_MODELS": ("dmschema_mining_models_response", True),
+    "MDSCHEMA_ACTIONS": ("mdschema_actions_response", True),
+    "MDSCHEMA_CUBES": ("mdschema_cubes_response", True),
+    "MDSCHEMA_DIMENSIONS": ("mdschema_dimensions_response", True),
+    "MDSCHEMA_FUNCTIONS": ("mdschema_functions_response", True),
+    "MDSCHEMA_HIERARCHIES": ("mdschema_hierarchies_response", True),
+    "MDSCHEMA_INPUT_DATASOURCES": ("mdschema_input_datasources_response", True),
+    "MDSCHEMA_KPIS": ("mdschema_kpis_response", True),
+    "MDSCHEMA_LEVELS": ("mdschema_levels_response", True),
+    "MDSCHEMA_MEASUREGROUPS": ("mdschema_measuregroups_response", True),
+    "MDSCHEMA_MEASUREGROUP_DIMENSIONS": (
+        "mdschema_measuregroup_dimensions_response",
+        True,
+    ),
+    "MDSCHEMA_MEASURES": ("mdschema_measures_response", True),
+    "MDSCHEMA_MEMBERS": ("mdschema_members_response", True),
+    "MDSCHEMA_PROPERTIES": ("mdschema_properties_response", True),
+    "MDSCHEMA_SETS": ("mdschema_sets_response", True),
+}
+
 # noinspection PyPep8Naming
 
 
@@ -41,6 +72,18 @@ class DictDiscoverReqHandler:
         self.cubes = self.executor.get_cubes_names()
         self.selected_cube = None
         self.session_id = uuid.uuid1()
+        # RequestType -> (bound response method, whether it takes the request),
+        # for the request types this handler implements
+        self.discover_responses = {
+            request_type: (getattr(self, method_name), takes_request)
+            for request_type, (method_name, takes_request) in DISCOVER_RESPONSES.items()
+            if hasattr(self, method_name)
+        }
+        # the cube config is parsed once, no need to look it up every request
+        self.xmla_authentication = bool(
+            self.executor.cube_config
+            and self.executor.cube_config["xmla_authentication"]
+        )
 
     def change_cube(self, new_cube):
         """If you change the cube in any request, we have to instantiate the
@@ -5,7 +5,7 @@ fr/library/ms186653(v=sql.110).aspx>`_ requests and responses."""
 
 import xmlwitch
 
-from ..xmla_discover_request_handler import XmlaDiscoverReqHandler
+from ..xmla_discover_request_handler import ROWSET_NAMESPACES, XmlaDiscoverReqHandler
 from ..xmla_discover_xsds import mdschema_hierarchies_xsd
 
 
@@ -35,13 +35,7 @@ class SparkXmlaDiscoverReqHandler(XmlaDiscoverReqHandler):
             self.change_cube(request.Properties.PropertyList.Catalog)
             xml = xmlwitch.Builder()
             with xml["return"]:
-                with xml.root(
-                    xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                    **{
-                        "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                        "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                    },
-                ):
+                with xml.root(**ROWSET_NAMESPACES):
                     xml.write(mdschema_hierarchies_xsd)
                     if (
                         restriction_list.HIERARCHY_VISIBILITY == 3
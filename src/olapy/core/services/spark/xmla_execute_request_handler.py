@@ -218,8 +218,7 @@ class SparkXmlaExecuteReqHandler(XmlaExecuteReqHandler):
 
         return str(xml)
 
-    def generate_cell_data(self):
-        # # type: () -> text_type
+    def iter_cell_data(self):
         """Example of CellData::
 
             <Cell CellOrdinal="0">
@@ -230,11 +229,12 @@ class SparkXmlaExecuteReqHandler(XmlaExecuteReqHandler):
                 <Value xsi:type="xsi:long">255</Value>
             </Cell>
 
-        :return: CellData as string
+        :return: CellData fragments (strings) iterator
         """
 
         if self.convert2formulas:
-            return self._generate_cells_data_convert2formulas()
+            yield self._generate_cells_data_convert2formulas()
+            return
 
         measures_agg = [
             column
@@ -263,17 +263,9 @@ class SparkXmlaExecuteReqHandler(XmlaExecuteReqHandler):
                 )
             )
 
-        xml = xmlwitch.Builder()
-        index = 0
-        for value in columns_loop:
-            # if np.isnan(value):
-            #     value = ""
-            with xml.Cell(CellOrdinal=str(index)):
-                xml.Value(str(value), **{"xsi:type": "xsi:long"})
-
-            index += 1
-
-        return str(xml)
+        # if np.isnan(value):
+        #     value = ""
+        yield from self._iter_cells(str(value) for value in columns_loop)
 
     def generate_slicer_axis(self):
         """Generate SlicerAxis which contains elements (dimensions) that are
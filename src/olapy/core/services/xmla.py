@@ -4,31 +4,29 @@ The main Module to manage
 requests and responses, and the Spyne SOAP server.
 """
 
-import imp
+import cgi
+import hashlib
 import logging
 import os
-import sys
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
 from os.path import expanduser, isfile
-from wsgiref.simple_server import make_server
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer, make_server
 
 import click
+from lxml import etree
 from spyne import AnyXml, Application, Fault, ServiceBase, rpc
-from spyne.const.http import HTTP_200
-from spyne.error import InvalidCredentialsError
+from spyne.const.http import HTTP_200, HTTP_405
+from spyne.error import InvalidCredentialsError, RequestNotAllowed
 from spyne.protocol.soap import Soap11
+from spyne.protocol.soap.mime import collapse_swa
 from spyne.server.http import HttpTransportContext
 from spyne.server.wsgi import WsgiApplication
-from sqlalchemy import create_engine
 
-from ..mdx.executor import MdxEngine
-from ..mdx.executor.lite_execute import MdxEngineLite
-from ..mdx.tools.config_file_parser import ConfigParser
-from ..mdx.tools.olapy_config_file_parser import DbConfigParser
 from ..services.models import DiscoverRequest, ExecuteRequest, Session
-from . import XmlaDiscoverReqHandler, XmlaExecuteReqHandler
-from .xmla_lib import XmlaProviderLib
-
-# unicode_literals This is heavily discouraged with click
+from .xmla_lib import XmlaProviderLib, is_convert2formulas
 
 
 class XmlaSoap11(Soap11):
@@ -42,7 +40,177 @@ class XmlaSoap11(Soap11):
                 ctx.transport.respond(HTTP_200)
                 raise Fault("")
 
-        return Soap11.create_in_document(self, ctx, charset)
+            content_type = ctx.transport.get_request_content_type()
+            if content_type is None or http_verb != "POST":
+                ctx.transport.resp_code = HTTP_405
+                raise RequestNotAllowed(
+                    "You must issue a POST request with the Content-Type "
+                    "header properly set."
+                )
+
+            content_type = cgi.parse_header(content_type)
+            ctx.in_string = collapse_swa(ctx, content_type, self.ns_soap_env)
+
+        parser_kwargs = self.parser_kwargs
+        if charset:
+            # the Content-Type charset rules, as when Spyne decodes the body
+            parser_kwargs = dict(parser_kwargs, encoding=charset)
+        ctx.in_document = _parse_request(
+            ctx.in_string, etree.XMLParser(**parser_kwargs)
+        )
+
+
+def _parse_request(in_string, parser):
+    """Parse the SOAP envelope without collecting its ``xml:id`` elements.
+
+    Spyne's own Soap11 parses requests with ``etree.XMLID`` to resolve SOAP
+    encoded multi-references (href attributes), that means one more whole
+    tree lookup per request, while XMLA requests (DiscoverRequest and
+    ExecuteRequest) never use them. Deserialization (and the soft
+    validation) of the body is still done by Spyne.
+
+    The body chunks are fed to the parser as they are read from wsgi.input
+    (Spyne reads them lazily, checking the max content length), the whole
+    body is never joined in memory.
+
+    :param in_string: iterable of request body chunks
+    :param parser: lxml XMLParser
+    :return: (envelope root, empty xmlids dict), as expected by
+        Soap11.decompose_incoming_envelope
+    """
+    try:
+        for chunk in in_string:
+            parser.feed(chunk)
+        root = parser.close()
+    except etree.XMLSyntaxError as e:
+        raise Fault("Client.XMLSyntaxError", str(e))
+
+    return root, {}
+
+
+def _get_session_header(ctx):
+    """The session id doesn't change for a discover request handler, build its
+    Session header once and share it between responses (spyne only reads it).
+
+    :param ctx: spyne MethodContext
+    :return: Session header with the discover request handler session id
+    """
+    config = ctx.app.config
+    session_header = config.get("session_header")
+    if session_header is None:
+        session_header = config["session_header"] = Session(
+            SessionId=str(config["discover_request_hanlder"].session_id)
+        )
+    return session_header
+
+
+def _parse_response(fragments):
+    """Spyne parses string responses anyway, so feed the response fragments to
+    the parser as they come instead of joining them into one (possibly huge)
+    string first.
+
+    :param fragments: iterable of xml strings
+    :return: lxml Element, used as is by Spyne for AnyXml values
+    """
+    parser = etree.XMLParser()
+    for fragment in fragments:
+        parser.feed(fragment)
+    return parser.close()
+
+
+# the request handlers keep the state of the request being processed (and the
+# selected cube), requests are served by several threads but the handlers are
+# used by one request at a time
+_NO_LOCK = nullcontext()
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """wsgiref server handling each connection in its own thread, so that
+    reading requests and sending responses overlap between clients."""
+
+    daemon_threads = True
+    # several pivot tables (or users) connect at once, the default backlog of
+    # 5 pending connections resets the extra ones
+    request_queue_size = 64
+
+
+# default size of the Execute responses cache, in MB of response text
+EXECUTE_RESPONSE_CACHE_SIZE = 64
+
+
+class ExecuteResponseCache:
+    """LRU cache of Execute responses.
+
+    Excel sends the same MDX queries again and again while navigating a pivot
+    table, responses are cached by (mdx query, convert2formulas) and dropped
+    whenever another cube is loaded (or the same one is reloaded).
+
+    Queries are keyed by their digest, so that long MDX queries are not kept
+    alive by the cache.
+
+    Responses can be huge, the cache is bounded by the total length of the
+    cached responses (maxsize, in characters), the least recently used ones
+    are dropped first and responses longer than maxsize are not cached.
+    """
+
+    def __init__(self, maxsize=EXECUTE_RESPONSE_CACHE_SIZE * 1024 * 1024):
+        self.maxsize = maxsize
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._responses = OrderedDict()  # type: OrderedDict
+        self._loaded_cube = None
+        self._lock = threading.RLock()
+
+    def get_response(self, executor, mdx_query, convert2formulas, generate_response):
+        """
+        :param executor: MdxEngine instance used to generate the response
+        :param mdx_query: the mdx query
+        :param convert2formulas: convert2formulas True or False
+        :param generate_response: function generating the response (string or
+            strings fragments) if not cached
+        :return: generate_response() result, cached or not
+        """
+        loaded_cube = (executor.cube, id(executor.star_schema_dataframe))
+        key = (
+            hashlib.blake2b(mdx_query.encode("utf8"), digest_size=16).digest(),
+            convert2formulas,
+        )
+        with self._lock:
+            if loaded_cube != self._loaded_cube:
+                self._responses.clear()
+                self.size = 0
+                self._loaded_cube = loaded_cube
+            cached = self._responses.get(key)
+            if cached is not None:
+                self._responses.move_to_end(key)
+                self.hits += 1
+                logging.debug(
+                    "Execute response cache hit (hits: %s, misses: %s)",
+                    self.hits,
+                    self.misses,
+                )
+                return cached[0]
+            self.misses += 1
+
+        response = generate_response()
+        if isinstance(response, str):
+            response_size = len(response)
+        else:
+            response_size = sum(len(fragment) for fragment in response)
+        if response_size > self.maxsize:
+            return response
+
+        with self._lock:
+            if key in self._responses:
+                # generated meanwhile by another request
+                self.size -= self._responses.pop(key)[1]
+            self._responses[key] = (response, response_size)
+            self.size += response_size
+            while self.size > self.maxsize:
+                _, (_, dropped_size) = self._responses.popitem(last=False)
+                self.size -= dropped_size
+        return response
 
 
 class XmlaProviderService(ServiceBase, XmlaProviderLib):
@@ -79,24 +247,20 @@ class XmlaProviderService(ServiceBase, XmlaProviderLib):
         """
         # ctx is the 'context' parameter used by Spyne
         discover_request_hanlder = ctx.app.config["discover_request_hanlder"]
-        ctx.out_header = Session(SessionId=str(discover_request_hanlder.session_id))
-        config_parser = discover_request_hanlder.executor.cube_config
-        if (
-            config_parser
-            and config_parser["xmla_authentication"]
-            and ctx.transport.req_env["QUERY_STRING"] != "admin"
-        ):
-            raise InvalidCredentialsError(
-                fault_string="You do not have permission to access this resource"
-            )
+        ctx.out_header = _get_session_header(ctx)
 
-        method_name = request.RequestType.lower() + "_response"
-        method = getattr(discover_request_hanlder, method_name)
-
-        if request.RequestType == "DISCOVER_DATASOURCES":
-            return method()
+        discover_response = discover_request_hanlder.discover_responses.get(
+            request.RequestType
+        )
+        if discover_response is None:
+            raise Fault(
+                faultcode="Client",
+                faultstring=f"Unsupported RequestType: {request.RequestType}",
+            )
 
-        return method(request)
+        method, takes_request = discover_response
+        with ctx.app.config.get("request_handlers_lock", _NO_LOCK):
+            return method(request) if takes_request else method()
 
     # Execute function must take 2 arguments (JUST 2!): Command and Properties.
     # We encapsulate them in ExecuteRequest object.
@@ -112,39 +276,73 @@ class XmlaProviderService(ServiceBase, XmlaProviderLib):
         """
 
         # same session_id in discover and execute
-        ctx.out_header = Session(
-            SessionId=str(ctx.app.config["discover_request_hanlder"].session_id)
-        )
+        ctx.out_header = _get_session_header(ctx)
         # same executor instance as the discovery (not reloading the cube another time)
-        mdx_query = request.Command.Statement.encode().decode("utf8")
+        mdx_query = request.Command.Statement
+        if isinstance(mdx_query, bytes):
+            mdx_query = mdx_query.decode("utf8")
         execute_request_hanlder = ctx.app.config["execute_request_hanlder"]
 
         # Hierarchize
-        if all(
-            key in mdx_query
-            for key in ["WITH MEMBER", "strtomember", "[Measures].[XL_SD0]"]
-        ):
-            convert2formulas = True
-        else:
-            convert2formulas = False
-
-        # change (or load cube) if direct execute handler without discover
-        # handler (which normally load the cube first)
-        if (
-            request.Properties
-            and request.Properties.PropertyList.Catalog
-            and not execute_request_hanlder.executor.cube
-        ):
-            execute_request_hanlder.executor.load_cube(
-                request.Properties.PropertyList.Catalog
+        convert2formulas = is_convert2formulas(mdx_query)
+
+        with ctx.app.config.get("request_handlers_lock", _NO_LOCK):
+            # change (or load cube) if direct execute handler without discover
+            # handler (which normally load the cube first)
+            if (
+                request.Properties
+                and request.Properties.PropertyList.Catalog
+                and not execute_request_hanlder.executor.cube
+            ):
+                execute_request_hanlder.executor.load_cube(
+                    request.Properties.PropertyList.Catalog
+                )
+
+            execute_response_cache = ctx.app.config.get("execute_response_cache")
+            if execute_response_cache is None:
+                execute_request_hanlder.execute_mdx_query(mdx_query, convert2formulas)
+                return _parse_response(execute_request_hanlder.iter_response())
+
+            def generate_response():
+                execute_request_hanlder.execute_mdx_query(mdx_query, convert2formulas)
+                return tuple(execute_request_hanlder.iter_response())
+
+            response = execute_response_cache.get_response(
+                execute_request_hanlder.executor,
+                mdx_query,
+                convert2formulas,
+                generate_response,
             )
 
-        execute_request_hanlder.execute_mdx_query(mdx_query, convert2formulas)
-        return execute_request_hanlder.generate_response()
+        return _parse_response(response)
+
+
+def _check_xmla_authentication(ctx):
+    """XmlaProviderService ``method_call`` listener, refuses Discover requests
+    without credentials if the cube config enables xmla authentication.
+
+    :param ctx: spyne MethodContext
+    """
+    if (
+        ctx.descriptor.name == "Discover"
+        and ctx.app.config["discover_request_hanlder"].xmla_authentication
+        and ctx.transport.req_env["QUERY_STRING"] != "admin"
+    ):
+        raise InvalidCredentialsError(
+            fault_string="You do not have permission to access this resource"
+        )
+
+
+# registered on the service (not on an application) so that every application
+# serving XmlaProviderService checks it
+XmlaProviderService.event_manager.add_listener("method_call", _check_xmla_authentication)
 
 
 home_directory = expanduser("~")
-logs_file = os.path.join(home_directory, "olapy-data", "logs", "xmla.log")
+olapy_data_directory = os.path.join(home_directory, "olapy-data")
+logs_file = os.path.join(olapy_data_directory, "logs", "xmla.log")
+db_config_file_path = os.path.join(olapy_data_directory, "olapy-config.yml")
+cube_config_file_path = os.path.join(olapy_data_directory, "cubes", "cubes-config.yml")
 
 
 def get_mdx_engine(
@@ -156,9 +354,15 @@ def get_mdx_engine(
     columns,
     measures,
 ):
+    # MdxEngine imports pandas, don't import it just to parse the cli options
+    from ..mdx.executor import MdxEngine
+    from ..mdx.executor.lite_execute import MdxEngineLite
+
     sqla_engine = None
     if sql_alchemy_uri:
-        sqla_engine = create_engine(sql_alchemy_uri)
+        from ..mdx.tools.connection import get_engine
+
+        sqla_engine = get_engine(sql_alchemy_uri)
 
     if direct_table_or_file:
         executor = MdxEngineLite(
@@ -181,35 +385,76 @@ def get_mdx_engine(
     return executor
 
 
-def get_spyne_app(discover_request_hanlder, execute_request_hanlder):
+def get_spyne_app(
+    discover_request_hanlder,
+    execute_request_hanlder,
+    execute_response_cache_size=EXECUTE_RESPONSE_CACHE_SIZE,
+):
     """
+    :param execute_response_cache_size: size of the Execute responses cache
+        in MB, 0 to disable caching
     :return: spyne  Application
     """
+    config = {
+        "discover_request_hanlder": discover_request_hanlder,
+        "execute_request_hanlder": execute_request_hanlder,
+        "request_handlers_lock": threading.RLock(),
+    }
+    if execute_response_cache_size:
+        config["execute_response_cache"] = ExecuteResponseCache(
+            maxsize=execute_response_cache_size * 1024 * 1024
+        )
     return Application(
         [XmlaProviderService],
         "urn:schemas-microsoft-com:xml-analysis",
         in_protocol=XmlaSoap11(validator="soft"),
-        out_protocol=XmlaSoap11(validator="soft"),
-        config={
-            "discover_request_hanlder": discover_request_hanlder,
-            "execute_request_hanlder": execute_request_hanlder,
-        },
+        # responses are written manually, spyne has nothing to validate there
+        out_protocol=XmlaSoap11(),
+        config=config,
     )
 
 
-def get_wsgi_application(mdx_engine):
+# building the request handlers introspects the cubes sources (csv folders,
+# databases...) and building the spyne application walks the whole service
+# interface to generate the wsdl, so both are done once per MdxEngine instance
+_WSGI_APPLICATIONS_CACHE_SIZE = 16
+_wsgi_applications = {}  # type: dict
+# the request handlers of an application share its MdxEngine under its
+# request_handlers_lock, two applications for one engine would not exclude
+# each other
+_wsgi_applications_lock = threading.Lock()
+
+
+def get_wsgi_application(
+    mdx_engine, execute_response_cache_size=EXECUTE_RESPONSE_CACHE_SIZE
+):
     """
     :param mdx_engine: MdxEngine instance
+    :param execute_response_cache_size: size of the Execute responses cache
+        in MB, 0 to disable caching (used when the application is built)
     :return: Wsgi Application
     """
-    discover_request_hanlder = XmlaDiscoverReqHandler(mdx_engine)
-    execute_request_hanlder = XmlaExecuteReqHandler(mdx_engine)
-    application = get_spyne_app(discover_request_hanlder, execute_request_hanlder)
+    # cached applications keep their engine alive, so its id can't be reused
+    with _wsgi_applications_lock:
+        wsgi_application = _wsgi_applications.get(id(mdx_engine))
+        if wsgi_application is None:
+            from . import XmlaDiscoverReqHandler, XmlaExecuteReqHandler
+
+            application = get_spyne_app(
+                XmlaDiscoverReqHandler(mdx_engine),
+                XmlaExecuteReqHandler(mdx_engine),
+                execute_response_cache_size,
+            )
 
-    # validator='soft' or nothing, this is important because spyne doesn't
-    # support encodingStyle until now !!!!
+            # validator='soft' or nothing, this is important because spyne doesn't
+            # support encodingStyle until now !!!!
 
-    return WsgiApplication(application)
+            wsgi_application = WsgiApplication(application)
+            if len(_wsgi_applications) >= _WSGI_APPLICATIONS_CACHE_SIZE:
+                # dicts keep insertion order, drop the oldest engine
+                del _wsgi_applications[next(iter(_wsgi_applications))]
+            _wsgi_applications[id(mdx_engine)] = wsgi_application
+    return wsgi_application
 
 
 @click.command()
@@ -227,6 +472,28 @@ def get_wsgi_application(mdx_engine):
     default=logs_file,
     help="Log file path. DEFAUL : " + logs_file,
 )
+@click.option(
+    "--log_level",
+    "-ll",
+    default="INFO",
+    type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"], case_sensitive=False),
+    help="Logging level, DEFAULT : INFO",
+)
+@click.option(
+    "--debug_xml",
+    "-dx",
+    is_flag=True,
+    default=False,
+    help="Log every xmla request and response (costly, each document is serialized again)",
+)
+@click.option(
+    "--execute_cache_size",
+    "-ecs",
+    default=EXECUTE_RESPONSE_CACHE_SIZE,
+    type=click.IntRange(min=0),
+    help="Size of the Execute responses cache in MB, 0 to disable it, DEFAULT : "
+    + str(EXECUTE_RESPONSE_CACHE_SIZE),
+)
 @click.option(
     "--sql_alchemy_uri",
     "-sa",
@@ -236,7 +503,7 @@ def get_wsgi_application(mdx_engine):
 @click.option(
     "--olapy_data",
     "-od",
-    default=os.path.join(expanduser("~"), "olapy-data"),
+    default=olapy_data_directory,
     help="Olapy Data folder location, Default : ~/olapy-data",
 )
 @click.option(
@@ -248,16 +515,14 @@ def get_wsgi_application(mdx_engine):
 @click.option(
     "--db_config_file",
     "-dbc",
-    default=os.path.join(home_directory, "olapy-data", "olapy-config.yml"),
-    help="Database configuration file path, DEFAULT : "
-    + os.path.join(home_directory, "olapy-data", "olapy-config.yml"),
+    default=db_config_file_path,
+    help="Database configuration file path, DEFAULT : " + db_config_file_path,
 )
 @click.option(
     "--cube_config_file",
     "-cbf",
-    default=os.path.join(home_directory, "olapy-data", "cubes", "cubes-config.yml"),
-    help="Cube config file path, DEFAULT : "
-    + os.path.join(home_directory, "olapy-data", "cubes", "cubes-config.yml"),
+    default=cube_config_file_path,
+    help="Cube config file path, DEFAULT : " + cube_config_file_path,
 )
 @click.option(
     "--direct_table_or_file",
@@ -282,6 +547,9 @@ def runserver(
     port,
     write_on_file,
     log_file_path,
+    log_level,
+    debug_xml,
+    execute_cache_size,
     sql_alchemy_uri,
     olapy_data,
     source_type,
@@ -292,12 +560,8 @@ def runserver(
     measures,
 ):
     """Start the xmla server."""
-    try:
-        imp.reload(sys)
-        # reload(sys)  # Reload is a hack
-        sys.setdefaultencoding("UTF8")
-    except Exception:
-        pass
+    from ..mdx.tools.config_file_parser import ConfigParser
+    from ..mdx.tools.olapy_config_file_parser import DbConfigParser
 
     cube_config = None
     if cube_config_file and isfile(cube_config_file):
@@ -324,20 +588,35 @@ def runserver(
         measures=measures,
     )
 
-    wsgi_application = get_wsgi_application(mdx_engine)
+    wsgi_application = get_wsgi_application(mdx_engine, execute_cache_size)
 
     # log to the console
     # logging.basicConfig(level=logging.DEBUG")
     # log to the file
 
+    log_level = getattr(logging, log_level.upper())
     if write_on_file:
-        if not os.path.isdir(os.path.join(home_directory, "olapy-data", "logs")):
-            os.makedirs(os.path.join(home_directory, "olapy-data", "logs"))
-        logging.basicConfig(level=logging.DEBUG, filename=log_file_path)
+        log_directory = os.path.dirname(log_file_path)
+        if log_directory:
+            os.makedirs(log_directory, exist_ok=True)
+        logging.basicConfig(level=log_level, filename=log_file_path)
     else:
-        logging.basicConfig(level=logging.DEBUG)
-    logging.getLogger("spyne.protocol.xml").setLevel(logging.DEBUG)
+        logging.basicConfig(level=log_level)
+    # at DEBUG level, spyne serializes every request and response to the logs
+    logging.getLogger("spyne.protocol.xml").setLevel(
+        logging.DEBUG if debug_xml else max(log_level, logging.INFO)
+    )
     logging.info("listening to http://127.0.0.1:8000/xmla")
     logging.info("wsdl is at: http://localhost:8000/xmla?wsdl")
-    server = make_server(host, port, wsgi_application)
-    server.serve_forever()
+    try:
+        # if waitress is installed, use it instead of wsgiref
+        from waitress import serve
+
+    except ImportError:
+        server = make_server(
+            host, port, wsgi_application, server_class=ThreadingWSGIServer
+        )
+        server.serve_forever()
+
+    else:
+        serve(wsgi_application, host=host, port=port, threads=8)
@@ -4,10 +4,12 @@ fr/library/ms186653(v=sql.110).aspx>`_ requests and responses."""
 
 
 import os
+from functools import lru_cache
 from urllib.parse import urlparse
 
 import xmlwitch
 
+from ..mdx.tools.connection import get_engine
 from ..services.dict_discover_request_handler import DictDiscoverReqHandler
 from ..services.xmla_discover_request_utils import (
     discover_literals_response_rows,
@@ -35,10 +37,12 @@ from .xmla_discover_xsds import (
     mdschema_sets_xsd,
 )
 
-try:
-    from sqlalchemy import create_engine
-except ImportError:
-    pass
+# attributes of the <root> element of the (non datasources) Discover rowsets
+ROWSET_NAMESPACES = {
+    "xmlns": "urn:schemas-microsoft-com:xml-analysis:rowset",
+    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
+    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
+}
 
 # noinspection PyPep8Naming
 
@@ -76,18 +80,24 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
                 facts = "Facts"
 
             self.selected_cube = new_cube
-            if "db" in self.executor.source_type:
-                new_sql_alchemy_uri = self._change_db_uri(
-                    self.sql_alchemy_uri, new_cube
-                )
-                self.executor.sqla_engine = create_engine(new_sql_alchemy_uri)
+            # the executor may already hold this cube (loaded by an Execute
+            # request for instance), no need for a new engine then
             if self.executor.cube != new_cube:
+                if "db" in self.executor.source_type:
+                    new_sql_alchemy_uri = self._change_db_uri(
+                        self.sql_alchemy_uri, new_cube
+                    )
+                    self.executor.sqla_engine = get_engine(new_sql_alchemy_uri)
                 self.executor.load_cube(new_cube, fact_table_name=facts)
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def discover_datasources_response():
         """List the data sources available on the server.
 
+        The response does not depend on the request nor on the loaded cube,
+        it is generated once and then reused.
+
         :return:
         """
         xml = xmlwitch.Builder()
@@ -124,13 +134,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
     ):
         xml = xmlwitch.Builder()
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(xsd)
                 if PropertyName:
 
@@ -184,13 +188,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
             xml = xmlwitch.Builder()
 
             with xml["return"]:
-                with xml.root(
-                    xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                    **{
-                        "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                        "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                    },
-                ):
+                with xml.root(**ROWSET_NAMESPACES):
                     xml.write(discover_schema_rowsets_xsd)
                     for resp_row in rows:
                         with xml.row:
@@ -382,13 +380,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
             xml = xmlwitch.Builder()
 
             with xml["return"]:
-                with xml.root(
-                    xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                    **{
-                        "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                        "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                    },
-                ):
+                with xml.root(**ROWSET_NAMESPACES):
                     xml.write(discover_literals_xsd)
                     for resp_row in rows:
                         with xml.row:
@@ -406,13 +398,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         """
         xml = xmlwitch.Builder()
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(mdschema_sets_xsd)
                 if request.Restrictions.RestrictionList:
                     if (
@@ -432,13 +418,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         """
         xml = xmlwitch.Builder()
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(mdschema_kpis_xsd)
 
                 if request.Restrictions.RestrictionList:
@@ -458,13 +438,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         """
         xml = xmlwitch.Builder()
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(dbschema_catalogs_xsd)
                 for catalogue in self.cubes:
                     with xml.row:
@@ -481,13 +455,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         xml = xmlwitch.Builder()
 
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(mdschema_cubes_xsd)
                 if request.Restrictions.RestrictionList:
                     if (
@@ -524,13 +492,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
 
             xml = xmlwitch.Builder()
             with xml["return"]:
-                with xml.root(
-                    xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                    **{
-                        "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                        "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                    },
-                ):
+                with xml.root(**ROWSET_NAMESPACES):
                     xml.write(dbschema_tables_xsd)
 
             return str(xml)
@@ -544,13 +506,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         xml = xmlwitch.Builder()
 
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(mdschema_measures_xsd)
 
                 if request.Restrictions.RestrictionList:
@@ -590,13 +546,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         xml = xmlwitch.Builder()
 
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(mdschema_dimensions_xsd)
                 if request.Restrictions.RestrictionList:
                     if (
@@ -657,13 +607,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         # Enumeration of hierarchies in all dimensions
         xml = xmlwitch.Builder()
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(mdschema_hierarchies_xsd)
 
                 if request.Restrictions.RestrictionList:
@@ -762,13 +706,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         xml = xmlwitch.Builder()
 
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(mdschema_levels_xsd)
 
                 if request.Restrictions.RestrictionList:
@@ -837,13 +775,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         xml = xmlwitch.Builder()
 
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(mdschema_measuresgroups_xsd)
                 if request.Restrictions.RestrictionList:
                     if (
@@ -873,13 +805,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         xml = xmlwitch.Builder()
 
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(mdschema_measuresgroups_dimensions_xsd)
 
                 if request.Restrictions.RestrictionList:
@@ -917,13 +843,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         """
         xml = xmlwitch.Builder()
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(mdschema_properties_properties_xsd)
                 if request.Restrictions.RestrictionList:
                     if (
@@ -1001,13 +921,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
 
         xml = xmlwitch.Builder()
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(mdschema_members_xsd)
                 if request.Restrictions.RestrictionList:
                     self.change_cube(request.Properties.PropertyList.Catalog)
@@ -1104,13 +1018,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         xml = xmlwitch.Builder()
 
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(discover_schema_rowsets_xsd)
         return str(xml)
 
@@ -1123,13 +1031,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         xml = xmlwitch.Builder()
 
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(discover_schema_rowsets_xsd)
         return str(xml)
 
@@ -1142,13 +1044,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         xml = xmlwitch.Builder()
 
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(discover_schema_rowsets_xsd)
         return str(xml)
 
@@ -1161,13 +1057,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         xml = xmlwitch.Builder()
 
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(mdschema_functions_xsd)
 
         return str(xml)
@@ -1181,13 +1071,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         xml = xmlwitch.Builder()
 
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(discover_schema_rowsets_xsd)
         return str(xml)
 
@@ -1197,13 +1081,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         xml = xmlwitch.Builder()
 
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(discover_enumerators_xsd)
 
                 with xml.row:
@@ -1219,13 +1097,7 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         xml = xmlwitch.Builder()
 
         with xml["return"]:
-            with xml.root(
-                xmlns="urn:schemas-microsoft-com:xml-analysis:rowset",
-                **{
-                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                },
-            ):
+            with xml.root(**ROWSET_NAMESPACES):
                 xml.write(discover_keywords_xsd)
                 with xml.row:
                     xml.Keyword("aggregate")
@@ -4,14 +4,61 @@ requests and responses."""
 
 import itertools
 from datetime import datetime
+from string import Formatter
 from typing import List, Text
 
-import numpy as np
 import xmlwitch
 
 from .dict_execute_request_handler import DictExecuteReqHandler
 from .xmla_execute_xsds import execute_xsd
 
+# the response envelope is static, only the generated parts are filled in
+EMPTY_EXECUTE_RESPONSE = """<return>
+  <root xmlns="urn:schemas-microsoft-com:xml-analysis:empty" />
+</return>"""
+
+EXECUTE_RESPONSE_TEMPLATE = """<return>
+  <root xmlns="urn:schemas-microsoft-com:xml-analysis:mddataset" \
+xmlns:xsd="http://www.w3.org/2001/XMLSchema" \
+xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">{execute_xsd}
+    <OlapInfo>
+      <CubeInfo>
+        <Cube>
+          <CubeName>Sales</CubeName>
+          <LastDataUpdate \
+xmlns="http://schemas.microsoft.com/analysisservices/2003/engine">\
+{last_data_update}</LastDataUpdate>
+          <LastSchemaUpdate \
+xmlns="http://schemas.microsoft.com/analysisservices/2003/engine">\
+{last_schema_update}</LastSchemaUpdate>
+        </Cube>
+      </CubeInfo>{cell_info}
+      <AxesInfo>{axes_info}{axes_info_slicer}
+      </AxesInfo>
+    </OlapInfo>
+    <Axes>{xs0}{slicer_axis}
+    </Axes>
+    <CellData>{cell_data}
+    </CellData>
+  </root>
+</return>"""
+
+# same output as xmlwitch for Cell elements, see _iter_cells
+CELL_TEMPLATE = """<Cell CellOrdinal="{}">
+  <Value xsi:type="xsi:long">{}</Value>
+</Cell>"""
+EMPTY_CELL_TEMPLATE = """<Cell CellOrdinal="{}">
+  <Value xsi:type="xsi:long" />
+</Cell>"""
+# Cell elements per CellData fragment
+CELLS_BATCH_SIZE = 1000
+
+# [(literal text, field name)] pieces of EXECUTE_RESPONSE_TEMPLATE
+EXECUTE_RESPONSE_PARTS = [
+    (literal_text, field_name)
+    for literal_text, field_name, _, _ in Formatter().parse(EXECUTE_RESPONSE_TEMPLATE)
+]
+
 
 class XmlaExecuteReqHandler(DictExecuteReqHandler):
     """The Execute method executes XMLA commands provided in the Command
@@ -37,6 +84,9 @@ class XmlaExecuteReqHandler(DictExecuteReqHandler):
         </Execute>
     """
 
+    # (loaded cube, LastSchemaUpdate timestamp), see _get_last_schema_update
+    _schema_update = (None, None)
+
     def _gen_measures_xs0(self, xml, tuples):
         """add elements representing measures to axis 0 element.
 
@@ -84,13 +134,25 @@ class XmlaExecuteReqHandler(DictExecuteReqHandler):
                 used_levels[tupl[0]] = list(used_levels.get(tupl[0], [])) + [tupl[2]]
         return used_levels
 
+    def _get_all_level_columns(self):
+        # [Geography].[Geography].[Continent]  -> first_lvlname : Country
+        # [Geography].[Geography].[Europe]     -> first_lvlname : Europe
+        all_tuples = self.executor.parser.decorticate_query(self.mdx_query)["all"]
+        return self._get_lvl_column_by_dimension(all_tuples)
+
     def _gen_xs0_tuples(self, xml, tuples, **kwargs):
         first_att = kwargs.get("first_att")
         split_df = kwargs.get("split_df")
-        all_tuples = self.executor.parser.decorticate_query(self.mdx_query)["all"]
-        # [Geography].[Geography].[Continent]  -> first_lvlname : Country
-        # [Geography].[Geography].[Europe]     -> first_lvlname : Europe
-        all_level_columns = self._get_lvl_column_by_dimension(all_tuples)
+        # parsing the mdx query for every tuple is costly, callers looping over
+        # tuples pass the parsing results
+        all_level_columns = kwargs.get("all_level_columns")
+        if all_level_columns is None:
+            all_level_columns = self._get_all_level_columns()
+        upper_mdx_query = kwargs.get("upper_mdx_query")
+        if upper_mdx_query is None:
+            upper_mdx_query = self.mdx_query.upper()
+        parent_unique_name = "PARENT_UNIQUE_NAME" in upper_mdx_query
+        hierarchy_unique_name = "HIERARCHY_UNIQUE_NAME" in upper_mdx_query
         for tupl in tuples:
             tuple_without_minus_1 = self.get_tuple_without_nan(tupl)
             current_lvl_name = split_df[tuple_without_minus_1[0]].columns[
@@ -133,14 +195,14 @@ class XmlaExecuteReqHandler(DictExecuteReqHandler):
                 xml.LNum(str(len(tuple_without_minus_1) - first_att))
                 xml.DisplayInfo("131076")
 
-                if "PARENT_UNIQUE_NAME" in self.mdx_query.upper():
+                if parent_unique_name:
                     self._gen_xs0_parent(
                         xml,
                         tuple=tuple_without_minus_1,
                         splitted_df=split_df,
                         first_att=first_att,
                     )
-                if "HIERARCHY_UNIQUE_NAME" in self.mdx_query.upper():
+                if hierarchy_unique_name:
                     xml.HIERARCHY_UNIQUE_NAME(
                         "[{0}].[{0}]".format(tuple_without_minus_1[0])
                     )
@@ -154,6 +216,11 @@ class XmlaExecuteReqHandler(DictExecuteReqHandler):
         :param axis: xs0 | xs1
         :return: tuples axis in xml
         """
+        # same for all tuples, get them once
+        all_level_columns = self._get_all_level_columns()
+        upper_mdx_query = self.mdx_query.upper()
+        hierarchized_tuples = self.executor.parser.hierarchized_tuples()
+
         xml = xmlwitch.Builder()
         with xml.Axis(name=axis):
             with xml.Tuples:
@@ -167,10 +234,15 @@ class XmlaExecuteReqHandler(DictExecuteReqHandler):
                             if tupls[0][-1] in self.executor.measures:
                                 continue
                         self._gen_xs0_tuples(
-                            xml, tupls, split_df=splitted_df, first_att=first_att
+                            xml,
+                            tupls,
+                            split_df=splitted_df,
+                            first_att=first_att,
+                            all_level_columns=all_level_columns,
+                            upper_mdx_query=upper_mdx_query,
                         )
                         # Hierarchize'
-                        if not self.executor.parser.hierarchized_tuples():
+                        if not hierarchized_tuples:
                             self._gen_measures_xs0(xml, tupls)
         return xml
 
@@ -392,40 +464,71 @@ class XmlaExecuteReqHandler(DictExecuteReqHandler):
 
         :return: CellData as string
         """
+        return "".join(self.iter_cell_data())
 
-        if self.convert2formulas:
-            return self._generate_cells_data_convert2formulas()
+    def iter_cell_data(self):
+        """Same as generate_cell_data, but the Cell elements are generated by
+        batches, cell data is the (possibly huge) bulk of Execute responses.
 
+        :return: CellData fragments (strings) iterator
+        """
+        if self.convert2formulas:
+            yield self._generate_cells_data_convert2formulas()
+            return
+
+        result = self.mdx_execution_result["result"]
+        # values are converted a whole column at a time
+        columns_values = [
+            self._cells_values(result.iloc[:, column_index])
+            for column_index in range(result.shape[1])
+        ]
         if (
             len(self.columns_desc["columns"].keys()) == 0
             or len(self.columns_desc["rows"].keys()) == 0
         ) and self.executor.facts in self.columns_desc["all"].keys():
             # iterate DataFrame horizontally
-            columns_loop = itertools.chain(
-                *[
-                    self.mdx_execution_result["result"][measure]
-                    for measure in self.mdx_execution_result["result"].columns
-                ]
-            )
+            columns_loop = itertools.chain.from_iterable(columns_values)
 
         else:
             # iterate DataFrame vertically
-            columns_loop = itertools.chain(
-                *list(self.mdx_execution_result["result"].itertuples(index=False))
-            )
+            columns_loop = itertools.chain.from_iterable(zip(*columns_values))
 
-        xml = xmlwitch.Builder()
-        index = 0
+        yield from self._iter_cells(columns_loop)
 
-        for value in columns_loop:
-            if np.isnan(value):
-                value = ""
-            with xml.Cell(CellOrdinal=str(index)):
-                xml.Value(str(value), **{"xsi:type": "xsi:long"})
-
-            index += 1
+    @staticmethod
+    def _cells_values(column):
+        """Convert a DataFrame column to cells values.
 
-        return str(xml)
+        :param column: pandas Series
+        :return: list of values as strings, empty string for NaN values
+        """
+        values = column.astype(str)
+        values[column.isna()] = ""
+        return values.tolist()
+
+    @staticmethod
+    def _iter_cells(values, batch_size=CELLS_BATCH_SIZE):
+        """Generate Cell elements, one per value, joined by batches of
+        batch_size cells (cell data can be huge, one xmlwitch element per cell
+        is costly).
+
+        :param values: cells values as strings, empty string for empty cells
+        :param batch_size: number of Cell elements per fragment
+        :return: Cell elements fragments (strings) iterator
+        """
+        cells = (
+            CELL_TEMPLATE.format(index, value)
+            if value
+            else EMPTY_CELL_TEMPLATE.format(index)
+            for index, value in enumerate(values)
+        )
+        separator = ""
+        while True:
+            batch = list(itertools.islice(cells, batch_size))
+            if not batch:
+                return
+            yield separator + "\n".join(batch)
+            separator = "\n"
 
     def _generate_axes_info_slicer_convert2formulas(self):
         """generate Slicer Axes for convert formulas query.
@@ -830,54 +933,52 @@ class XmlaExecuteReqHandler(DictExecuteReqHandler):
 
         return str(xml)
 
-    def generate_response(self):
-        """generate the xmla response.
+    def _get_last_schema_update(self, now):
+        """The cube schema only changes when a cube is (re)loaded, so keep the
+        timestamp of the first response sent since then.
 
-        :return: xmla response as string
+        :param now: current timestamp as string
+        :return: LastSchemaUpdate timestamp as string
         """
+        loaded_cube = (self.executor.cube, id(self.executor.star_schema_dataframe))
+        if self._schema_update[0] != loaded_cube:
+            self._schema_update = (loaded_cube, now)
+        return self._schema_update[1]
 
-        if self.mdx_query == "":
-            # check if command contains a query
-            xml = xmlwitch.Builder()
-            with xml["return"]:
-                xml.root(xmlns="urn:schemas-microsoft-com:xml-analysis:empty")
+    def iter_response(self):
+        """generate the xmla response piece by piece, so that it can be
+        written or parsed without being concatenated into one string.
 
-            return str(xml)
+        :return: xmla response fragments (strings) iterator
+        """
 
-        else:
+        if self.mdx_query == "":
+            # check if command contains a query
+            yield EMPTY_EXECUTE_RESPONSE
+            return
+
+        now = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+        last_schema_update = self._get_last_schema_update(now)
+        parts = {
+            "execute_xsd": lambda: execute_xsd,
+            "last_data_update": lambda: now,
+            "last_schema_update": lambda: last_schema_update,
+            "cell_info": self.generate_cell_info,
+            "axes_info": self.generate_axes_info,
+            "axes_info_slicer": self.generate_axes_info_slicer,
+            "xs0": self.generate_xs0,
+            "slicer_axis": self.generate_slicer_axis,
+        }
+        for literal_text, field_name in EXECUTE_RESPONSE_PARTS:
+            yield literal_text
+            if field_name == "cell_data":
+                yield from self.iter_cell_data()
+            elif field_name:
+                yield parts[field_name]()
 
-            xml = xmlwitch.Builder()
+    def generate_response(self):
+        """generate the xmla response.
 
-            with xml["return"]:
-                with xml.root(
-                    xmlns="urn:schemas-microsoft-com:xml-analysis:mddataset",
-                    **{
-                        "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                        "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                    },
-                ):
-                    xml.write(execute_xsd)
-                    with xml.OlapInfo:
-                        with xml.CubeInfo:
-                            with xml.Cube:
-                                xml.CubeName("Sales")
-                                xml.LastDataUpdate(
-                                    datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-                                    xmlns="http://schemas.microsoft.com/analysisservices/2003/engine",
-                                )
-                                xml.LastSchemaUpdate(
-                                    datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-                                    xmlns="http://schemas.microsoft.com/analysisservices/2003/engine",
-                                )
-                        xml.write(self.generate_cell_info())
-                        with xml.AxesInfo:
-                            xml.write(self.generate_axes_info())
-                            xml.write(self.generate_axes_info_slicer())
-
-                    with xml.Axes:
-                        xml.write(self.generate_xs0())
-                        xml.write(self.generate_slicer_axis())
-
-                    with xml.CellData:
-                        xml.write(self.generate_cell_data())
-            return str(xml)
+        :return: xmla response as string
+        """
+        return "".join(self.iter_response())
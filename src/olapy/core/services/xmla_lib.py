@@ -1,10 +1,6 @@
 import importlib
-from pprint import pprint
+from typing import TYPE_CHECKING
 
-import pandas as pd
-
-from ..mdx.executor import MdxEngine
-from ..mdx.executor.utils import inject_dataframes
 from ..services.request_properties_models import (
     Command,
     DiscoverRequest,
@@ -15,6 +11,25 @@ from ..services.request_properties_models import (
     Restrictionlist,
 )
 
+if TYPE_CHECKING:
+    from ..mdx.executor import MdxEngine
+
+
+def is_convert2formulas(mdx_query):
+    """Whether mdx_query is an Excel "convert to formulas" query.
+
+    The most selective key is tested first, so that other queries are
+    scanned once only.
+
+    :param mdx_query: MDX query string
+    :return: bool
+    """
+    return (
+        "[Measures].[XL_SD0]" in mdx_query
+        and "strtomember" in mdx_query
+        and "WITH MEMBER" in mdx_query
+    )
+
 
 class XmlaProviderLib:
     """XmlaProviderLib tu use olapy as library without running any server (no
@@ -33,13 +48,14 @@ class XmlaProviderLib:
         :param request: :class:`DiscoverRequest` object
         :return: XML Discover response as string
         """
-        method_name = request.RequestType.lower() + "_response"
-        method = getattr(self.discover_request_hanlder, method_name)
-
-        if request.RequestType == "DISCOVER_DATASOURCES":
-            return method()
+        discover_response = self.discover_request_hanlder.discover_responses.get(
+            request.RequestType
+        )
+        if discover_response is None:
+            raise ValueError(f"Unsupported RequestType: {request.RequestType}")
 
-        return method(request)
+        method, takes_request = discover_response
+        return method(request) if takes_request else method()
 
     def Execute(self, request):
         """Send xmla commands to an instance of MdxEngine.
@@ -53,16 +69,12 @@ class XmlaProviderLib:
 
         # same session_id in discover and execute
         # same executor instance as the discovery (not reloading the cube another time)
-        mdx_query = request.Command.Statement.encode().decode("utf8")
+        mdx_query = request.Command.Statement
+        if isinstance(mdx_query, bytes):
+            mdx_query = mdx_query.decode("utf8")
 
         # Hierarchize
-        if all(
-            key in mdx_query
-            for key in ["WITH MEMBER", "strtomember", "[Measures].[XL_SD0]"]
-        ):
-            convert2formulas = True
-        else:
-            convert2formulas = False
+        convert2formulas = is_convert2formulas(mdx_query)
 
         self.execute_request_hanlder.execute_mdx_query(mdx_query, convert2formulas)
 
@@ -84,10 +96,13 @@ def get_response(
     :param output: xmla or dict output type
     :return: xmla response
     """
+    from ..mdx import executor as mdx_executor
+    from ..mdx.executor.utils import inject_dataframes
+
     if mdx_engine:
         executor = mdx_engine
     else:
-        executor = MdxEngine(facts=facts_table_name)
+        executor = mdx_executor.MdxEngine(facts=facts_table_name)
     inject_dataframes(executor, dataframes, facts_table_name=facts_table_name)
 
     module = importlib.import_module(
@@ -139,6 +154,10 @@ def get_response(
 
 
 if __name__ == "__main__":
+    from pprint import pprint
+
+    import pandas as pd
+
     xmla_request_params = {
         "cube": "sales",
         "request_type": "DISCOVER_PROPERTIES",
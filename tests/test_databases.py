@@ -1,6 +1,8 @@
 import pandas as pd
 from pandas.util.testing import assert_frame_equal
 
+from olapy.core.mdx.tools.connection import get_engine
+
 from .queries import (
     query1,
     query7,
@@ -505,3 +507,7 @@ def test_execution_query16(executor):
     )
 
     assert_frame_equal(df, test_df)
+
+
+def test_engines_are_shared():
+    assert get_engine("sqlite://") is get_engine("sqlite://")
@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+from olapy.core.services.xmla import ExecuteResponseCache
+
+
+class Generator:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f"<return>{self.calls}</return>"
+
+
+def test_same_query_is_generated_once():
+    cache = ExecuteResponseCache()
+    executor = SimpleNamespace(cube="sales", star_schema_dataframe=object())
+    generate = Generator()
+
+    first = cache.get_response(executor, "SELECT FROM [sales]", False, generate)
+    second = cache.get_response(executor, "SELECT FROM [sales]", False, generate)
+
+    assert first == second == "<return>1</return>"
+    assert generate.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cube_reload_invalidates_responses():
+    cache = ExecuteResponseCache()
+    executor = SimpleNamespace(cube="sales", star_schema_dataframe=object())
+    generate = Generator()
+
+    cache.get_response(executor, "SELECT FROM [sales]", False, generate)
+    executor.star_schema_dataframe = object()
+    response = cache.get_response(executor, "SELECT FROM [sales]", False, generate)
+
+    assert response == "<return>2</return>"
+    assert generate.calls == 2
+
+
+def test_least_recently_used_response_is_dropped():
+    # room for two responses
+    cache = ExecuteResponseCache(maxsize=2 * len("<return>1</return>"))
+    executor = SimpleNamespace(cube="sales", star_schema_dataframe=object())
+    generate = Generator()
+
+    for mdx_query in ("query1", "query2", "query1", "query3"):
+        cache.get_response(executor, mdx_query, False, generate)
+    cache.get_response(executor, "query1", False, generate)
+    cache.get_response(executor, "query2", False, generate)
+
+    assert generate.calls == 4
+    assert cache.size == 2 * len("<return>1</return>")
+
+
+def test_large_response_is_not_cached():
+    cache = ExecuteResponseCache(maxsize=10)
+    executor = SimpleNamespace(cube="sales", star_schema_dataframe=object())
+
+    def generate():
+        return ("<return>", "1" * 10, "</return>")
+
+    response = cache.get_response(executor, "query1", False, generate)
+
+    assert response == generate()
+    assert (cache.size, len(cache._responses)) == (0, 0)
@@ -1,4 +1,11 @@
-from olapy.core.services.xmla_lib import get_response
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from olapy.core.services import XmlaDiscoverReqHandler
+from olapy.core.services.dict_discover_request_handler import DISCOVER_RESPONSES
+from olapy.core.services.xmla import get_wsgi_application
+from olapy.core.services.xmla_lib import get_response, is_convert2formulas
 
 
 def test_dict_execute(executor):
@@ -54,3 +61,51 @@ def test_dict_discover(executor):
             "Value": "Mouadh",
         }
     ]
+
+
+def test_dict_discover_unsupported_request_type(executor):
+    xmla_request_params = {
+        "cube": "sales",
+        "request_type": "DISCOVER_NOTHING",
+        "properties": {},
+        "restrictions": {},
+        "mdx_query": None,
+    }
+
+    with pytest.raises(ValueError):
+        get_response(
+            xmla_request_params,
+            executor.tables_loaded,
+            output="dict",
+            facts_table_name="facts",
+            mdx_engine=executor,
+        )
+
+
+def test_is_convert2formulas():
+    assert is_convert2formulas(
+        "WITH MEMBER [Measures].[XL_SD0] AS strtomember(...) SELECT ..."
+    )
+    assert not is_convert2formulas(
+        "WITH MEMBER [Measures].[XL_SD0] AS 1 SELECT [Measures].[XL_SD0] ON 0"
+    )
+    assert not is_convert2formulas("SELECT [Measures].[Amount] ON 0 FROM [sales]")
+
+
+def test_xmla_discover_responses(executor):
+    discover_request_handler = XmlaDiscoverReqHandler(executor)
+
+    assert (
+        discover_request_handler.discover_responses.keys()
+        == DISCOVER_RESPONSES.keys()
+    )
+
+
+def test_wsgi_application_per_engine(executor):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        applications = list(pool.map(get_wsgi_application, [executor] * 8))
+
+    assert all(application is applications[0] for application in applications)
+    config = applications[0].app.config
+    assert config["discover_request_hanlder"].executor is executor
+    assert config["execute_request_hanlder"].executor is executor
@@ -1,5 +1,6 @@
 from textwrap import dedent
 
+import pandas as pd
 import pytest
 import xmlwitch
 
@@ -138,6 +139,35 @@ def test_query15_cell_data(executor):
     assert str(xml) == xmla_tools.generate_cell_data()
 
 
+def test_empty_cells():
+    xml = xmlwitch.Builder()
+    with xml.Cell(CellOrdinal="0"):
+        xml.Value("", **{"xsi:type": "xsi:long"})
+    with xml.Cell(CellOrdinal="1"):
+        xml.Value("255", **{"xsi:type": "xsi:long"})
+
+    assert str(xml) == "".join(XmlaExecuteReqHandler._iter_cells(["", "255"]))
+
+
+def test_cells_batches():
+    values = ["", "255", "768", "", "4"]
+    fragments = list(XmlaExecuteReqHandler._iter_cells(values, batch_size=2))
+
+    assert len(fragments) == 3
+    assert "".join(fragments) == "".join(XmlaExecuteReqHandler._iter_cells(values))
+    assert "".join(fragments).count("\n</Cell>\n<Cell") == len(values) - 1
+
+
+def test_cells_values():
+    column = pd.Series([768, None, 255.5])
+
+    assert XmlaExecuteReqHandler._cells_values(column) == ["768.0", "", "255.5"]
+    assert XmlaExecuteReqHandler._cells_values(pd.Series([768, 255])) == [
+        "768",
+        "255",
+    ]
+
+
 #
 # Test xs0 responses
 #
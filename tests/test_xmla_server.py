@@ -0,0 +1,122 @@
+from io import BytesIO
+
+import pytest
+from spyne import Application
+from spyne.protocol.soap import Soap11
+from spyne.server.wsgi import WsgiApplication
+
+from olapy.core.services import XmlaDiscoverReqHandler, XmlaExecuteReqHandler
+from olapy.core.services.xmla import (
+    XmlaProviderService,
+    get_spyne_app,
+    get_wsgi_application,
+)
+
+DISCOVER_DATASOURCES = """<soap:Envelope \
+xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+<soap:Body>
+<Discover xmlns="urn:schemas-microsoft-com:xml-analysis">
+<RequestType>DISCOVER_DATASOURCES</RequestType>
+<Restrictions><RestrictionList>{}</RestrictionList></Restrictions>
+<Properties><PropertyList /></Properties>
+</Discover>
+</soap:Body>
+</soap:Envelope>"""
+
+
+def call_wsgi_application(
+    application, body, content_type="text/xml; charset=utf-8", query_string=""
+):
+    """Send a POST request to a wsgi application without any server.
+
+    :return: (status, body) of the response
+    """
+    environ = {
+        "REQUEST_METHOD": "POST",
+        "CONTENT_TYPE": content_type,
+        "CONTENT_LENGTH": str(len(body)),
+        "QUERY_STRING": query_string,
+        "PATH_INFO": "/",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "8000",
+        "wsgi.url_scheme": "http",
+        "wsgi.input": BytesIO(body),
+    }
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = status
+
+    content = b"".join(application(environ, start_response))
+    return response["status"], content
+
+
+@pytest.fixture
+def authenticated_application(executor, monkeypatch):
+    monkeypatch.setattr(executor, "cube_config", {"xmla_authentication": True})
+    # built by hand, like any application serving XmlaProviderService
+    application = Application(
+        [XmlaProviderService],
+        "urn:schemas-microsoft-com:xml-analysis",
+        in_protocol=Soap11(validator="soft"),
+        out_protocol=Soap11(validator="soft"),
+        config={
+            "discover_request_hanlder": XmlaDiscoverReqHandler(executor),
+            "execute_request_hanlder": XmlaExecuteReqHandler(executor),
+        },
+    )
+    return WsgiApplication(application)
+
+
+def test_xmla_authentication_refused(authenticated_application):
+    status, content = call_wsgi_application(
+        authenticated_application, DISCOVER_DATASOURCES.format("").encode("utf8")
+    )
+
+    assert not status.startswith("200")
+    assert b"You do not have permission to access this resource" in content
+
+
+def test_xmla_authentication_admin(authenticated_application):
+    status, content = call_wsgi_application(
+        authenticated_application,
+        DISCOVER_DATASOURCES.format("").encode("utf8"),
+        query_string="admin",
+    )
+
+    assert status.startswith("200")
+    assert b"<DataSourceName>sales</DataSourceName>" in content
+
+
+def test_request_charset(executor):
+    # no xml declaration, the body encoding is only given by the Content-Type
+    body = DISCOVER_DATASOURCES.format("<CATALOG_NAME>Société</CATALOG_NAME>")
+    status, content = call_wsgi_application(
+        get_wsgi_application(executor),
+        body.encode("iso-8859-1"),
+        content_type="text/xml; charset=iso-8859-1",
+    )
+
+    assert status.startswith("200")
+    assert b"<DataSourceName>sales</DataSourceName>" in content
+
+
+def test_request_syntax_error(executor):
+    status, content = call_wsgi_application(
+        get_wsgi_application(executor), b"<soap:Envelope"
+    )
+
+    assert not status.startswith("200")
+    assert b"Client.XMLSyntaxError" in content
+
+
+def test_execute_response_cache_disabled(executor):
+    discover_request_hanlder = XmlaDiscoverReqHandler(executor)
+    execute_request_hanlder = XmlaExecuteReqHandler(executor)
+
+    assert "execute_response_cache" in (
+        get_spyne_app(discover_request_hanlder, execute_request_hanlder).config
+    )
+    assert "execute_response_cache" not in (
+        get_spyne_app(discover_request_hanlder, execute_request_hanlder, 0).config
+    )